@@ -1,12 +1,26 @@
 """Ghostline — Deterministic replay for AI agents."""
 
-from ghostline.recorder import GhostlineRecorder
-from ghostline.replayer import GhostlineReplayer
-from ghostline.context import record, replay
-from ghostline.wrapper import wrap
-from ghostline.format import fork
+import importlib
+
+# export_html shares its name with its submodule, so it is bound eagerly:
+# importing the submodule would otherwise shadow a lazy attribute.
 from ghostline.export_html import export_html
-from ghostline.search import GhostlineIndex
+
+# Everything else loads on first access (PEP 562), so `import ghostline`
+# does not pay for zstandard or numpy until they are used.
+_LAZY_ATTRS = {
+    "GhostlineRecorder": "ghostline.recorder",
+    "GhostlineReplayer": "ghostline.replayer",
+    "record": "ghostline.context",
+    "replay": "ghostline.context",
+    "wrap": "ghostline.wrapper",
+    "fork": "ghostline.format",
+    "GhostlineIndex": "ghostline.search",
+}
+
+# Submodules that `import ghostline` used to load as a side effect; they are
+# still reachable as attributes (e.g. ghostline.scrub.ScrubConfig)
+_SUBMODULES = {"context", "format", "recorder", "replayer", "scrub", "search", "wrapper"}
 
 __version__ = "0.1.0"
 __all__ = [
@@ -19,3 +33,19 @@ __all__ = [
     "export_html",
     "GhostlineIndex",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module(module), name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | _SUBMODULES)
@@ -1,6 +1,5 @@
 """Context managers for recording and replaying."""
 
-from contextlib import contextmanager
 from pathlib import Path
 
 from ghostline.recorder import GhostlineRecorder
@@ -9,8 +8,52 @@ from ghostline.scrub import ScrubConfig
 from ghostline.wrapper import set_recorder, set_replayer
 
 
-@contextmanager
-def record(path: str | Path, scrub: bool | ScrubConfig = True):
+class _RecordContext:
+    """Context manager returned by record()."""
+
+    __slots__ = ("_path", "_scrub", "_recorder")
+
+    def __init__(self, path: str | Path, scrub: bool | ScrubConfig):
+        self._path = path
+        self._scrub = scrub
+        self._recorder = None
+
+    def __enter__(self) -> GhostlineRecorder:
+        recorder = GhostlineRecorder(self._path, scrub=self._scrub)
+        recorder.start()
+        set_recorder(recorder)
+        self._recorder = recorder
+        return recorder
+
+    def __exit__(self, *exc):
+        set_recorder(None)
+        self._recorder.stop()
+        self._recorder = None
+
+
+class _ReplayContext:
+    """Context manager returned by replay()."""
+
+    __slots__ = ("_path", "_replayer")
+
+    def __init__(self, path: str | Path):
+        self._path = path
+        self._replayer = None
+
+    def __enter__(self) -> GhostlineReplayer:
+        replayer = GhostlineReplayer(self._path)
+        replayer.start()
+        set_replayer(replayer)
+        self._replayer = replayer
+        return replayer
+
+    def __exit__(self, *exc):
+        set_replayer(None)
+        self._replayer.stop()
+        self._replayer = None
+
+
+def record(path: str | Path, scrub: bool | ScrubConfig = True) -> _RecordContext:
     """Record all wrapped API calls to a .ghostline file.
 
     Args:
@@ -23,18 +66,10 @@ def record(path: str | Path, scrub: bool | ScrubConfig = True):
         with ghostline.record("run.ghostline"):
             response = client.messages.create(...)  # secrets auto-redacted
     """
-    recorder = GhostlineRecorder(path, scrub=scrub)
-    recorder.start()
-    set_recorder(recorder)
-    try:
-        yield recorder
-    finally:
-        set_recorder(None)
-        recorder.stop()
+    return _RecordContext(path, scrub)
 
 
-@contextmanager
-def replay(path: str | Path):
+def replay(path: str | Path) -> _ReplayContext:
     """Replay cached responses from a .ghostline file.
 
     Usage:
@@ -42,11 +77,4 @@ def replay(path: str | Path):
         with ghostline.replay("run.ghostline"):
             response = client.messages.create(...)  # served from cache
     """
-    replayer = GhostlineReplayer(path)
-    replayer.start()
-    set_replayer(replayer)
-    try:
-        yield replayer
-    finally:
-        set_replayer(None)
-        replayer.stop()
+    return _ReplayContext(path)
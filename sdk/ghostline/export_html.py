@@ -1,10 +1,41 @@
 """Export a .ghostline file as a self-contained HTML file with embedded viewer."""
 
-import base64
-import importlib.resources
+import functools
 import os
 import warnings
 
+try:
+    # SIMD base64 (AVX2/NEON); same API as the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# Read size when streaming the recording into the HTML; a multiple of 3 so
+# each chunk encodes to base64 without padding and chunks concatenate cleanly
+_B64_CHUNK = 48 * 1024
+
+# Page template, split around the inline CSS, data blob and JS
+_HTML_PRE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>Ghostline — {filename}</title>
+  <link rel="preconnect" href="https://fonts.googleapis.com" />
+  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin />
+  <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600&family=JetBrains+Mono:wght@400;500&display=swap" rel="stylesheet" />
+  <style>"""
+_HTML_MID1 = """</style>
+</head>
+<body>
+  <div id="root"></div>
+  <script id="ghostline-data" type="application/octet-stream" data-filename="{filename}">"""
+_HTML_MID2 = """</script>
+  <script type="module">"""
+_HTML_POST = """</script>
+</body>
+</html>"""
+
 # Viewer dist files are bundled relative to the package
 _VIEWER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "viewer", "dist")
 
@@ -30,6 +61,23 @@ def _find_viewer_assets() -> tuple[str, str]:
     return js_file, css_file
 
 
+@functools.lru_cache(maxsize=1)
+def _load_viewer_assets(
+    js_path: str, js_mtime: int, js_size: int,
+    css_path: str, css_mtime: int, css_size: int,
+) -> tuple[bytes, bytes]:
+    """Read the viewer JS and CSS as raw UTF-8 bytes.
+
+    Cached on path, mtime and size so batch exports read the bundle once
+    and a rebuilt viewer is picked up automatically.
+    """
+    with open(js_path, "rb") as f:
+        js_content = f.read()
+    with open(css_path, "rb") as f:
+        css_content = f.read()
+    return js_content, css_content
+
+
 def export_html(ghostline_path: str, output_path: str | None = None) -> str:
     """Export a .ghostline file as a standalone HTML file.
 
@@ -46,6 +94,10 @@ def export_html(ghostline_path: str, output_path: str | None = None) -> str:
     Returns:
         Path to the generated HTML file.
 
+    Raises:
+        ValueError: If the recording uses a compression dictionary (format
+            v2), which the viewer cannot read yet.
+
     Warning:
         The exported HTML contains the full replay data. If the recording
         was made without scrubbing (scrub=False), it may contain API keys
@@ -60,38 +112,47 @@ def export_html(ghostline_path: str, output_path: str | None = None) -> str:
     if output_path is None:
         output_path = ghostline_path.removesuffix(".ghostline") + ".html"
 
-    # Read the .ghostline binary
-    with open(ghostline_path, "rb") as f:
-        data_b64 = base64.b64encode(f.read()).decode("ascii")
-
-    # Read viewer assets
+    # Read viewer assets (cached)
     js_path, css_path = _find_viewer_assets()
-    with open(js_path, "r") as f:
-        js_content = f.read()
-    with open(css_path, "r") as f:
-        css_content = f.read()
+    js_stat, css_stat = os.stat(js_path), os.stat(css_path)
+    js_content, css_content = _load_viewer_assets(
+        js_path, js_stat.st_mtime_ns, js_stat.st_size,
+        css_path, css_stat.st_mtime_ns, css_stat.st_size,
+    )
 
     filename = os.path.basename(ghostline_path)
 
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>Ghostline — {filename}</title>
-  <link rel="preconnect" href="https://fonts.googleapis.com" />
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin />
-  <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600&family=JetBrains+Mono:wght@400;500&display=swap" rel="stylesheet" />
-  <style>{css_content}</style>
-</head>
-<body>
-  <div id="root"></div>
-  <script id="ghostline-data" type="application/octet-stream" data-filename="{filename}">{data_b64}</script>
-  <script type="module">{js_content}</script>
-</body>
-</html>"""
-
-    with open(output_path, "w") as f:
-        f.write(html)
+    with open(ghostline_path, "rb") as src:
+        _check_viewer_can_read(src)
+        src.seek(0)
+        with open(output_path, "wb") as out:
+            _write_page(src, out, filename, css_content, js_content)
 
     return output_path
+
+
+def _check_viewer_can_read(src):
+    # `import ghostline` loads this module eagerly; keep the format stack lazy
+    from ghostline.format import _FIXED_HEADER, DICT_FORMAT_VERSION
+
+    header = src.read(_FIXED_HEADER.size)
+    if len(header) == _FIXED_HEADER.size:
+        _, version, _ = _FIXED_HEADER.unpack(header)
+        if version == DICT_FORMAT_VERSION:
+            raise ValueError(
+                "recording uses a compression dictionary (format v2), which the "
+                "viewer cannot read; record without dict_data to export it"
+            )
+
+
+def _write_page(src, out, filename: str, css_content: bytes, js_content: bytes):
+    """Write the page piece by piece: only one large buffer (viewer bundle
+    or a base64 chunk) is alive at a time."""
+    out.write(_HTML_PRE.format(filename=filename).encode("utf-8"))
+    out.write(css_content)
+    out.write(_HTML_MID1.format(filename=filename).encode("utf-8"))
+    while chunk := src.read(_B64_CHUNK):
+        out.write(base64.b64encode(chunk))
+    out.write(_HTML_MID2.encode("utf-8"))
+    out.write(js_content)
+    out.write(_HTML_POST.encode("utf-8"))
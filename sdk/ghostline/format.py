@@ -2,15 +2,51 @@
 
 Mirrors the Rust implementation in ghostline-core.
 Layout: [Header] [zstd(msgpack(frame))...] [Index] [index_offset: u64]
+
+Version 2 adds an optional zstd dictionary to the header. Writers only emit
+version 2 when a dictionary is supplied, so plain recordings stay readable
+by version 1 readers. Only this SDK reads version 2 so far: ghostline-core,
+the CLI and the viewer (and so export_html) accept version 1 only.
 """
 
 import hashlib
+import mmap
 import struct
-import zstandard as zstd
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterator, TypeVar
+
 import msgpack
 
+# zstandard loads a native library; it is imported where it is first used
+if TYPE_CHECKING:
+    import zstandard as zstd
+
 MAGIC = b"GHSTLINE"
+# Version written by default; DICT_FORMAT_VERSION when a dictionary is used
 FORMAT_VERSION = 1
+DICT_FORMAT_VERSION = 2
+_SUPPORTED_VERSIONS = (FORMAT_VERSION, DICT_FORMAT_VERSION)
+
+# Default size for dictionaries built by train_dictionary()
+_DEFAULT_DICT_SIZE = 64 * 1024
+
+# Precompiled layouts for header fields, frame length prefixes and the index
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_INDEX_ENTRY = struct.Struct("<32sQ")
+_INDEX_TRAILER = struct.Struct("<IQ")  # entry_count, index_offset
+_FIXED_HEADER = struct.Struct("<8sIQ")  # magic, version, started_at
+
+_T = TypeVar("_T")
+
+# Upper bound for frames whose zstd header omits the content size
+# (streaming encoders); same limit as the Rust reader.
+_MAX_FRAME_SIZE = 10 * 1024 * 1024
+
+# Parallel decoding hands each task about this many compressed bytes, so
+# per-task overhead stays small next to the decompression work
+_DECODE_BATCH_BYTES = 256 * 1024
 
 
 class Frame:
@@ -30,31 +66,96 @@ class Frame:
         self.response_bytes = response_bytes
         self.latency_ms = latency_ms
         self.timestamp = timestamp
-        self.request_hash = request_hash or hashlib.sha256(request_bytes).digest()
-
-    def to_msgpack(self) -> bytes:
-        return msgpack.packb({
-            "request_hash": self.request_hash,
-            "request_bytes": self.request_bytes,
-            "response_bytes": self.response_bytes,
-            "latency_ms": self.latency_ms,
-            "timestamp": self.timestamp,
-        })
+        if request_hash is None:
+            request_hash = self.hash_bytes(request_bytes)
+        self.request_hash = request_hash
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> bytes:
+        """SHA-256 of a request body, hashed in one shot without copying."""
+        return hashlib.sha256(memoryview(data)).digest()
+
+    def to_msgpack(self, packer: msgpack.Packer | None = None) -> bytes:
+        # Positional layout, same field order as the Rust struct (rmp_serde)
+        fields = [
+            self.request_hash,
+            self.request_bytes,
+            self.response_bytes,
+            self.latency_ms,
+            self.timestamp,
+        ]
+        if packer is None:
+            return msgpack.packb(fields, use_bin_type=True)
+        return packer.pack(fields)
 
     @classmethod
     def from_msgpack(cls, data: bytes) -> "Frame":
-        d = msgpack.unpackb(data, raw=True)
+        d = msgpack.unpackb(data, raw=False)
+        if isinstance(d, dict):
+            # Map layout written by earlier SDK versions
+            d = (
+                d["request_hash"],
+                d["request_bytes"],
+                d["response_bytes"],
+                d["latency_ms"],
+                d["timestamp"],
+            )
+        request_hash, request_bytes, response_bytes, latency_ms, timestamp = d
         return cls(
-            request_bytes=d[b"request_bytes"],
-            response_bytes=d[b"response_bytes"],
-            latency_ms=d[b"latency_ms"],
-            timestamp=d[b"timestamp"],
-            request_hash=d[b"request_hash"],
+            request_bytes=_as_bytes(request_bytes),
+            response_bytes=_as_bytes(response_bytes),
+            latency_ms=latency_ms,
+            timestamp=timestamp,
+            request_hash=_as_bytes(request_hash),
         )
 
 
+def _as_bytes(value) -> bytes:
+    """rmp_serde encodes byte arrays as lists of ints; normalize to bytes."""
+    return value if isinstance(value, bytes) else bytes(value)
+
+
+# msgpack bin8/bin16/bin32 length headers
+_BIN_LEN = {0xC4: struct.Struct(">B"), 0xC5: struct.Struct(">H"), 0xC6: struct.Struct(">I")}
+_FRAME_ARRAY_HEADER = 0x95  # fixarray, 5 elements
+
+
+def _bin_span(data: bytes, pos: int) -> tuple[int, int] | None:
+    """(start, end) of the msgpack bin value at pos, or None if not bin."""
+    header = _BIN_LEN.get(data[pos])
+    if header is None:
+        return None
+    (length,) = header.unpack_from(data, pos + 1)
+    start = pos + 1 + header.size
+    return start, start + length
+
+
+def _hash_and_response(data: bytes) -> tuple[bytes, bytes]:
+    """Extract request_hash and response_bytes from a packed frame.
+
+    Walks the msgpack headers of the positional layout directly, so the
+    request body is skipped rather than copied. Other layouts (map frames,
+    rmp_serde int arrays) go through the full decoder.
+    """
+    if data[0] == _FRAME_ARRAY_HEADER:
+        hash_span = _bin_span(data, 1)
+        request_span = hash_span and _bin_span(data, hash_span[1])
+        response_span = request_span and _bin_span(data, request_span[1])
+        if response_span is not None:
+            return data[hash_span[0]:hash_span[1]], data[response_span[0]:response_span[1]]
+    frame = Frame.from_msgpack(data)
+    return frame.request_hash, frame.response_bytes
+
+
 class GhostlineWriter:
-    """Write frames to a .ghostline file."""
+    """Write frames to a .ghostline file.
+
+    With ``dedupe=True``, a frame whose request and response both match an
+    earlier frame is not written again; its index entry points at the
+    earlier frame instead, so it reads back with that frame's latency and
+    timestamp. Readers that walk frames sequentially (the viewer) see only
+    the first occurrence.
+    """
 
     def __init__(
         self,
@@ -63,124 +164,255 @@ class GhostlineWriter:
         git_sha: bytes | None = None,
         parent_run_id: bytes | None = None,
         fork_at_step: int | None = None,
+        dict_data: bytes | None = None,
+        dedupe: bool = False,
     ):
+        import zstandard as zstd
+
         self._f = f
         self._index: list[tuple[bytes, int]] = []
-        self._compressor = zstd.ZstdCompressor(level=3)
+        self._dedupe = dedupe
+        # request_hash -> (offset, response digest) of the first such frame
+        self._written: dict[bytes, tuple[int, bytes]] = {}
+        # One compressor for the whole file: its context is reset, not
+        # rebuilt, per frame. Each frame stays a standalone zstd frame with
+        # its content size recorded so readers decompress in one allocation.
+        self._compressor = zstd.ZstdCompressor(
+            level=3,
+            write_content_size=True,
+            dict_data=zstd.ZstdCompressionDict(dict_data) if dict_data else None,
+        )
+        self._packer = msgpack.Packer(use_bin_type=True)
 
-        # Write header
-        f.write(MAGIC)
-        f.write(struct.pack("<I", FORMAT_VERSION))
-        f.write(struct.pack("<Q", started_at))
+        # Assemble the header, then write it in one call
+        version = DICT_FORMAT_VERSION if dict_data else FORMAT_VERSION
+        header = bytearray(_FIXED_HEADER.pack(MAGIC, version, started_at))
         if git_sha:
-            f.write(b"\x01")
-            f.write(git_sha)
+            header += b"\x01"
+            header += git_sha
         else:
-            f.write(b"\x00")
+            header += b"\x00"
 
         # Fork metadata
         if parent_run_id and fork_at_step is not None:
-            f.write(b"\x01")
-            f.write(parent_run_id)  # 32 bytes
-            f.write(struct.pack("<I", fork_at_step))
+            header += b"\x01"
+            header += parent_run_id  # 32 bytes
+            header += _U32.pack(fork_at_step)
         else:
-            f.write(b"\x00")
+            header += b"\x00"
+
+        # Compression dictionary (v2 only)
+        if dict_data:
+            header += b"\x01"
+            header += _U32.pack(len(dict_data))
+            header += dict_data
 
+        f.write(header)
         self._offset = f.tell()
 
     def append(self, frame: Frame):
-        packed = frame.to_msgpack()
+        if self._dedupe:
+            response_digest = hashlib.sha256(frame.response_bytes).digest()
+            existing = self._written.get(frame.request_hash)
+            if existing is not None and existing[1] == response_digest:
+                self._index.append((frame.request_hash, existing[0]))
+                return
+
+        packed = frame.to_msgpack(self._packer)
         compressed = self._compressor.compress(packed)
 
         offset = self._offset
-        self._f.write(struct.pack("<I", len(compressed)))
-        self._f.write(compressed)
+        self._f.write(_U32.pack(len(compressed)) + compressed)
         self._offset += 4 + len(compressed)
 
         self._index.append((frame.request_hash, offset))
+        if self._dedupe:
+            self._written.setdefault(frame.request_hash, (offset, response_digest))
 
     def finish(self):
         index_offset = self._offset
 
+        # Entries, entry count and index pointer in one buffer, one write
+        entry_size = _INDEX_ENTRY.size
+        tail = bytearray(len(self._index) * entry_size + _INDEX_TRAILER.size)
+        pos = 0
         for req_hash, offset in self._index:
-            self._f.write(req_hash)  # 32 bytes
-            self._f.write(struct.pack("<Q", offset))
-
-        self._f.write(struct.pack("<I", len(self._index)))
-        self._f.write(struct.pack("<Q", index_offset))
+            _INDEX_ENTRY.pack_into(tail, pos, req_hash, offset)
+            pos += entry_size
+        _INDEX_TRAILER.pack_into(tail, pos, len(self._index), index_offset)
+        self._f.write(tail)
         self._f.flush()
 
 
 class GhostlineReader:
-    """Read frames from a .ghostline file."""
+    """Read frames from a .ghostline file.
+
+    Files backed by a real descriptor are memory-mapped, so frames are
+    sliced straight out of the page cache instead of seek + read. Other
+    file-like objects (e.g. io.BytesIO) are read into memory once.
+    """
 
     def __init__(self, f):
+        import zstandard as zstd
+
         self._f = f
-        self._decompressor = zstd.ZstdDecompressor()
+        self._buf = _map_file(f)
+        self._view = memoryview(self._buf)
+        buf = self._buf
 
-        # Read header
-        magic = f.read(8)
-        if magic != MAGIC:
+        # Read header: fixed fields in one unpack, then the optional blocks
+        magic = bytes(self._view[:8])
+        if magic != MAGIC or len(buf) < _FIXED_HEADER.size:
             raise ValueError(f"not a .ghostline file (got {magic!r})")
 
-        (self.version,) = struct.unpack("<I", f.read(4))
-        if self.version != FORMAT_VERSION:
+        _, self.version, self.started_at = _FIXED_HEADER.unpack_from(buf)
+        if self.version not in _SUPPORTED_VERSIONS:
             raise ValueError(f"unsupported version: {self.version}")
+        pos = _FIXED_HEADER.size
 
-        (self.started_at,) = struct.unpack("<Q", f.read(8))
-
-        has_sha = f.read(1)
-        self.git_sha = f.read(20) if has_sha == b"\x01" else None
+        has_sha = buf[pos]
+        pos += 1
+        self.git_sha = None
+        if has_sha == 1:
+            self.git_sha = bytes(self._view[pos:pos + 20])
+            pos += 20
 
         # Read fork metadata
-        has_fork = f.read(1)
-        if has_fork == b"\x01":
-            self.parent_run_id = f.read(32)
-            (self.fork_at_step,) = struct.unpack("<I", f.read(4))
+        has_fork = buf[pos]
+        pos += 1
+        if has_fork == 1:
+            self.parent_run_id = bytes(self._view[pos:pos + 32])
+            (self.fork_at_step,) = _U32.unpack_from(buf, pos + 32)
+            pos += 36
         else:
             self.parent_run_id = None
             self.fork_at_step = None
 
+        # Read compression dictionary
+        self.dict_data = None
+        if self.version >= DICT_FORMAT_VERSION and buf[pos] == 1:
+            (dict_len,) = _U32.unpack_from(buf, pos + 1)
+            self.dict_data = bytes(self._view[pos + 5:pos + 5 + dict_len])
+        self._zdict = zstd.ZstdCompressionDict(self.dict_data) if self.dict_data else None
+        self._decompressor = zstd.ZstdDecompressor(dict_data=self._zdict)
+
         # Read index from end
-        f.seek(-8, 2)
-        (index_offset,) = struct.unpack("<Q", f.read(8))
-        f.seek(-12, 2)
-        (count,) = struct.unpack("<I", f.read(4))
+        end = len(buf)
+        count, index_offset = _INDEX_TRAILER.unpack_from(buf, end - _INDEX_TRAILER.size)
+        index_end = index_offset + count * _INDEX_ENTRY.size
+        self._index: list[tuple[bytes, int]] = list(
+            _INDEX_ENTRY.iter_unpack(self._view[index_offset:index_end])
+        )
+        self._index_offset = index_offset
+        # First occurrence wins, matching the previous linear scan
+        self._by_hash: dict[bytes, int] = {}
+        for req_hash, offset in self._index:
+            self._by_hash.setdefault(req_hash, offset)
 
-        f.seek(index_offset)
-        self._index: list[tuple[bytes, int]] = []
-        for _ in range(count):
-            req_hash = f.read(32)
-            (offset,) = struct.unpack("<Q", f.read(8))
-            self._index.append((req_hash, offset))
+    def close(self):
+        """Release the memory map. The underlying file is left open."""
+        self._view.release()
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     @property
     def frame_count(self) -> int:
         return len(self._index)
 
+    @property
+    def compressed_size(self) -> int:
+        """Bytes of length-prefixed compressed frames, between header and index."""
+        if not self._index:
+            return 0
+        return self._index_offset - min(offset for _, offset in self._index)
+
     def get_frame(self, idx: int) -> Frame:
         if idx < 0 or idx >= len(self._index):
             raise IndexError(f"frame index {idx} out of range")
         _, offset = self._index[idx]
-        self._f.seek(offset)
-        (compressed_len,) = struct.unpack("<I", self._f.read(4))
-        compressed = self._f.read(compressed_len)
-        decompressed = self._decompressor.decompress(compressed)
-        return Frame.from_msgpack(decompressed)
+        return self._read_frame(offset)
 
     def lookup_by_hash(self, req_hash: bytes) -> Frame | None:
-        for stored_hash, offset in self._index:
-            if stored_hash == req_hash:
-                self._f.seek(offset)
-                (compressed_len,) = struct.unpack("<I", self._f.read(4))
-                compressed = self._f.read(compressed_len)
-                decompressed = self._decompressor.decompress(compressed)
-                return Frame.from_msgpack(decompressed)
-        return None
+        offset = self._by_hash.get(req_hash)
+        if offset is None:
+            return None
+        return self._read_frame(offset)
+
+    def _read_frame(self, offset: int) -> Frame:
+        return Frame.from_msgpack(self._decompress(offset, self._decompressor))
+
+    def _decompress(self, offset: int, decompressor: "zstd.ZstdDecompressor") -> bytes:
+        (compressed_len,) = _U32.unpack_from(self._buf, offset)
+        start = offset + _U32.size
+        compressed = self._view[start:start + compressed_len]
+        return decompressor.decompress(compressed, max_output_size=_MAX_FRAME_SIZE)
+
+    def iter_frames(self, max_workers: int = 1) -> Iterator[Frame]:
+        """Yield every frame in index order.
+
+        With max_workers > 1, frames are decompressed on a thread pool in
+        batches of about _DECODE_BATCH_BYTES; zstd releases the GIL, so
+        large files decode on several cores.
+        """
+        return self._decode_all(Frame.from_msgpack, max_workers)
+
+    def iter_hash_response(self, max_workers: int = 1) -> Iterator[tuple[bytes, bytes]]:
+        """Yield (request_hash, response_bytes) for every frame in index order.
+
+        Cheaper than iter_frames() when only the replay mapping is needed:
+        no Frame objects are built and request bodies are never copied.
+        """
+        return self._decode_all(_hash_and_response, max_workers)
+
+    def _decode_all(self, decode: Callable[[bytes], _T], max_workers: int) -> Iterator[_T]:
+        offsets = [offset for _, offset in self._index]
+        if max_workers <= 1:
+            for offset in offsets:
+                yield decode(self._decompress(offset, self._decompressor))
+            return
+
+        import zstandard as zstd
+
+        batches: list[list[int]] = [[]]
+        batch_bytes = 0
+        for offset in offsets:
+            if batch_bytes >= _DECODE_BATCH_BYTES:
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append(offset)
+            batch_bytes += _U32.unpack_from(self._buf, offset)[0]
+
+        # Decompressor contexts must not be shared between threads
+        local = threading.local()
+
+        def work(batch: list[int]) -> list[_T]:
+            decompressor = getattr(local, "decompressor", None)
+            if decompressor is None:
+                decompressor = local.decompressor = zstd.ZstdDecompressor(dict_data=self._zdict)
+            return [decode(self._decompress(offset, decompressor)) for offset in batch]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for decoded in pool.map(work, batches):
+                yield from decoded
 
     def __iter__(self):
-        for i in range(self.frame_count):
-            yield self.get_frame(i)
+        return self.iter_frames()
+
+
+def _map_file(f) -> mmap.mmap | bytes:
+    """Memory-map a file object, or read it whole if it has no descriptor."""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        # No usable descriptor (in-memory streams) or an empty file
+        f.seek(0)
+        return f.read()
 
 
 def fork(source_path: str, at_step: int, output_path: str | None = None) -> str:
@@ -200,9 +432,8 @@ def fork(source_path: str, at_step: int, output_path: str | None = None) -> str:
         stem = source_path.removesuffix(".ghostline")
         output_path = f"{stem}-fork-{at_step}.ghostline"
 
-    with open(source_path, "rb") as f:
-        reader = GhostlineReader(f)
-
+    # Close the map before writing: a mapped file cannot be replaced on Windows
+    with open(source_path, "rb") as f, GhostlineReader(f) as reader:
         if at_step >= reader.frame_count:
             raise IndexError(
                 f"step {at_step} out of range — file has {reader.frame_count} frames"
@@ -211,7 +442,7 @@ def fork(source_path: str, at_step: int, output_path: str | None = None) -> str:
         # Compute parent_run_id: SHA-256(started_at || first_frame_hash)
         first_frame = reader.get_frame(0)
         parent_run_id = hashlib.sha256(
-            struct.pack("<Q", reader.started_at) + first_frame.request_hash
+            _U64.pack(reader.started_at) + first_frame.request_hash
         ).digest()
 
         frames = [reader.get_frame(i) for i in range(at_step + 1)]
@@ -223,9 +454,38 @@ def fork(source_path: str, at_step: int, output_path: str | None = None) -> str:
             git_sha=reader.git_sha,
             parent_run_id=parent_run_id,
             fork_at_step=at_step,
+            dict_data=reader.dict_data,
         )
         for frame in frames:
             writer.append(frame)
         writer.finish()
 
     return output_path
+
+
+def train_dictionary(paths: list[str], dict_size: int = _DEFAULT_DICT_SIZE) -> bytes:
+    """Train a zstd dictionary from the frames of existing recordings.
+
+    Recordings of the same agent share system prompts and tool schemas, so a
+    dictionary trained on past runs shrinks new frames considerably. Pass the
+    result as ``dict_data`` to GhostlineWriter or GhostlineRecorder.
+
+    Args:
+        paths: .ghostline files to sample frames from.
+        dict_size: Maximum dictionary size in bytes.
+
+    Returns:
+        Raw dictionary bytes.
+    """
+    import zstandard as zstd
+
+    samples = []
+    for path in paths:
+        with open(path, "rb") as f:
+            packer = msgpack.Packer(use_bin_type=True)
+            with GhostlineReader(f) as reader:
+                for frame in reader:
+                    samples.append(frame.to_msgpack(packer))
+    if not samples:
+        raise ValueError("no frames to train a dictionary from")
+    return zstd.train_dictionary(dict_size, samples).as_bytes()
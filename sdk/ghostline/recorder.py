@@ -1,13 +1,17 @@
 """Record LLM API calls to a .ghostline file."""
 
-import hashlib
-import json
+import os
+import queue
+import threading
 import time
 from pathlib import Path
 
 from ghostline.format import Frame, GhostlineWriter
 from ghostline.scrub import ScrubConfig, scrub_bytes
 
+# Frames and index entries are small; buffer them into large write() calls
+_WRITE_BUFFER_SIZE = 1 << 20
+
 
 class GhostlineRecorder:
     """Records API calls by intercepting client methods.
@@ -26,12 +30,37 @@ class GhostlineRecorder:
         from ghostline.scrub import ScrubConfig
         config = ScrubConfig(custom_strings=[("my-secret", "[REDACTED]")])
         recorder = GhostlineRecorder("run.ghostline", scrub=config)
+
+    Compression dictionary trained on earlier runs (writes format v2, which
+    only the Python SDK reads; the CLI, viewer and export_html reject it):
+        from ghostline.format import train_dictionary
+        zdict = train_dictionary(["run1.ghostline", "run2.ghostline"])
+        recorder = GhostlineRecorder("run3.ghostline", dict_data=zdict)
+
+    Agents that resend identical calls can store repeats as index entries
+    pointing at the first copy (see GhostlineWriter):
+        recorder = GhostlineRecorder("run.ghostline", dedupe=True)
+
+    capture() only enqueues the call; scrubbing, hashing, compression and
+    disk writes happen on a background thread so the wrapped client
+    returns immediately. stop() drains the queue before finishing the file.
     """
 
-    def __init__(self, path: str | Path, scrub: bool | ScrubConfig = True):
+    def __init__(
+        self,
+        path: str | Path,
+        scrub: bool | ScrubConfig = True,
+        dict_data: bytes | None = None,
+        dedupe: bool = False,
+    ):
         self.path = Path(path)
+        self._dict_data = dict_data
+        self._dedupe = dedupe
         self._file = None
         self._writer = None
+        self._queue = None
+        self._thread = None
+        self._error = None
         self._started = False
         if isinstance(scrub, ScrubConfig):
             self._scrub_config = scrub
@@ -43,33 +72,69 @@ class GhostlineRecorder:
     def start(self):
         if self._started:
             return
-        self._file = open(self.path, "wb")
+        self._file = open(self.path, "wb", buffering=_WRITE_BUFFER_SIZE)
         started_at = int(time.time() * 1000)
-        self._writer = GhostlineWriter(self._file, started_at)
+        self._writer = GhostlineWriter(
+            self._file, started_at, dict_data=self._dict_data, dedupe=self._dedupe
+        )
+        self._queue = queue.SimpleQueue()
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._drain, name="ghostline-recorder", daemon=True
+        )
+        self._thread.start()
         self._started = True
 
     def stop(self):
         if not self._started:
             return
-        self._writer.finish()
-        self._file.close()
-        self._file = None
-        self._writer = None
-        self._started = False
+        self._queue.put(None)
+        self._thread.join()
+        error = self._error
+        try:
+            self._writer.finish()
+            # The recording is complete once stop() returns; make it durable
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+            self._writer = None
+            self._queue = None
+            self._thread = None
+            self._error = None
+            self._started = False
+        if error is not None:
+            raise RuntimeError("recorder failed to write frames") from error
 
     def capture(self, request_bytes: bytes, response_bytes: bytes, latency_ms: int):
         """Record a single request/response pair.
 
         If scrubbing is enabled, sensitive data is redacted before the
         frame is written to disk. The hash is computed on scrubbed data.
+        The frame is written asynchronously; see the class docstring.
         """
         if not self._started:
             raise RuntimeError("recorder not started")
+        if self._error is not None:
+            raise RuntimeError("recorder failed to write frames") from self._error
+        timestamp = int(time.time() * 1000)
+        self._queue.put((request_bytes, response_bytes, latency_ms, timestamp))
+
+    def _drain(self):
+        """Background thread: turn queued calls into frames on disk."""
+        while (item := self._queue.get()) is not None:
+            try:
+                self._write_frame(*item)
+            except BaseException as e:
+                self._error = e
+                return
+
+    def _write_frame(self, request_bytes: bytes, response_bytes: bytes, latency_ms: int, timestamp: int):
         if self._scrub_config is not None:
             request_bytes = scrub_bytes(request_bytes, self._scrub_config)
             response_bytes = scrub_bytes(response_bytes, self._scrub_config)
-        timestamp = int(time.time() * 1000)
-        frame = Frame(request_bytes, response_bytes, latency_ms, timestamp)
+        request_hash = Frame.hash_bytes(request_bytes)
+        frame = Frame(request_bytes, response_bytes, latency_ms, timestamp, request_hash)
         self._writer.append(frame)
 
     def __enter__(self):
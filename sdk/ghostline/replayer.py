@@ -1,9 +1,13 @@
 """Replay cached responses from a .ghostline file."""
 
-import hashlib
+import os
 from pathlib import Path
 
-from ghostline.format import GhostlineReader
+from ghostline.format import Frame, GhostlineReader
+
+# Recordings with at least this many compressed frame bytes are decoded on
+# a thread pool (when there is more than one core)
+_PARALLEL_PRELOAD_MIN_BYTES = 16 * 1024 * 1024
 
 
 class GhostlineReplayer:
@@ -31,13 +35,17 @@ class GhostlineReplayer:
         self._file = open(self.path, "rb")
         self._reader = GhostlineReader(self._file)
         # Pre-load all frames into a hash map
-        for frame in self._reader:
-            self._cache[frame.request_hash] = frame.response_bytes
+        workers = 1
+        if self._reader.compressed_size >= _PARALLEL_PRELOAD_MIN_BYTES:
+            workers = os.cpu_count() or 1
+        for req_hash, response in self._reader.iter_hash_response(max_workers=workers):
+            self._cache[req_hash] = response
         self._started = True
 
     def stop(self):
         if not self._started:
             return
+        self._reader.close()
         self._file.close()
         self._file = None
         self._reader = None
@@ -46,10 +54,13 @@ class GhostlineReplayer:
 
     def lookup(self, request_bytes: bytes) -> bytes | None:
         """Look up a cached response by request body hash."""
+        return self.lookup_hash(Frame.hash_bytes(request_bytes))
+
+    def lookup_hash(self, request_hash: bytes) -> bytes | None:
+        """Look up a cached response by the SHA-256 digest of the request body."""
         if not self._started:
             raise RuntimeError("replayer not started")
-        req_hash = hashlib.sha256(request_bytes).digest()
-        result = self._cache.get(req_hash)
+        result = self._cache.get(request_hash)
         if result is not None:
             self.hits += 1
         else:
@@ -2,11 +2,31 @@
 
 Redacts API keys, tokens, and PII from request and response bytes
 before they are written to disk. Configurable via pattern lists.
+
+Patterns run one after another, in list order. When google-re2 is
+installed they run on RE2, whose matching time is linear in the input;
+`re` backtracks and degrades badly on long runs such as hex dumps. When
+Hyperscan is installed, the input is first scanned for all patterns in a
+single pass; otherwise it is checked for the literals each default
+pattern needs. Only the patterns that can match are run, so clean
+payloads — the common case — never reach a regex engine at all.
 """
 
+import functools
 import re
+import threading
 from dataclasses import dataclass, field
 
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 # Common patterns for sensitive data
 _DEFAULT_PATTERNS: list[tuple[str, str]] = [
     # Anthropic (must be before generic sk-)
@@ -36,6 +56,30 @@ _DEFAULT_PATTERNS: list[tuple[str, str]] = [
      "[REDACTED_SECRET]"),
 ]
 
+# Literals that must occur in the input for a default pattern to match, in
+# _DEFAULT_PATTERNS order. Patterns not listed here (user patterns) always run.
+_TRIGGERS: dict[str, tuple[bytes, ...]] = dict(zip(
+    [p for p, _ in _DEFAULT_PATTERNS],
+    [
+        (b"sk-ant-",),
+        (b"sk-proj-",),
+        (b"sk_live_",),
+        (b"sk_test_",),
+        (b"pk_live_",),
+        (b"pk_test_",),
+        (b"sk-",),
+        (b"AKIA",),
+        (b"aws_secret_access_key", b"AWS_SECRET_ACCESS_KEY"),
+        (b"ghp_",),
+        (b"gho_",),
+        (b"github_pat_",),
+        (b"Bearer",),
+        (b"@",),
+        (b"api", b"token", b"secret", b"password", b"authorization"),
+    ],
+    strict=True,
+))
+
 
 @dataclass
 class ScrubConfig:
@@ -47,6 +91,14 @@ class ScrubConfig:
         extra_patterns: Additional patterns appended to defaults.
         redact_emails: Whether to redact email addresses (default True).
         custom_strings: Exact strings to redact (e.g., known API keys).
+
+    The built-in patterns are ASCII and run on the raw payload bytes. User
+    patterns (extra_patterns, or patterns replacing the defaults) keep
+    `str` semantics, such as Unicode \\w and `.` matching one character:
+    they run on the payload decoded as UTF-8, with undecodable bytes kept
+    through surrogateescape. Compiled patterns are cached by content
+    outside the config, so the config stays plain data (copyable,
+    picklable) and in-place edits are picked up on the next scrub.
     """
 
     patterns: list[tuple[str, str]] = field(default_factory=list)
@@ -60,15 +112,138 @@ class ScrubConfig:
             if not self.redact_emails:
                 base = [(p, r) for p, r in base if r != "[REDACTED_EMAIL]"]
             self.patterns = base
+        # Compile now so invalid patterns fail at construction
+        self._compiled()
 
     @property
     def all_patterns(self) -> list[tuple[str, str]]:
         return self.patterns + self.extra_patterns
 
+    def _compiled(self) -> "_CompiledPatterns":
+        return _compile(
+            tuple((p, r) for p, r in self.all_patterns),
+            tuple((o, r) for o, r in self.custom_strings),
+        )
+
+
+class _CompiledPatterns:
+    """Compiled form of one set of patterns and custom strings."""
+
+    def __init__(
+        self,
+        patterns: tuple[tuple[str, str], ...],
+        custom_strings: tuple[tuple[str, str], ...],
+    ):
+        # Built-in patterns: bytes re.Pattern, or its RE2 counterpart when
+        # google-re2 is installed. User patterns: str re.Pattern.
+        self.compiled = [
+            (_compile_pattern(p, r), r.encode("utf-8")) if p in _TRIGGERS else (re.compile(p), r)
+            for p, r in patterns
+        ]
+        self.triggers = [_TRIGGERS.get(p) for p, _ in patterns]
+        # User patterns may match what earlier replacements wrote, which a
+        # scan of the original payload cannot see, so they always run
+        self.unfiltered = frozenset(i for i, t in enumerate(self.triggers) if t is None)
+        self.custom = [(o.encode("utf-8"), r.encode("utf-8")) for o, r in custom_strings]
+        self.hyperscan = _hyperscan_db(patterns)
+
+
+@functools.lru_cache(maxsize=32)
+def _compile(patterns: tuple, custom_strings: tuple) -> _CompiledPatterns:
+    return _CompiledPatterns(patterns, custom_strings)
+
+
+def _compile_pattern(pattern: str, replacement: str):
+    """Compile one built-in pattern for bytes, with RE2 when it accepts it.
+
+    RE2 rejects lookarounds and backreferences, and only `re` expands
+    group references in the replacement; those patterns stay on `re`.
+    RE2 reads bytes patterns as UTF-8 by default; Latin-1 makes `.` and
+    negated classes match single bytes, as they do in `re`.
+    """
+    compiled = re.compile(pattern.encode("utf-8"))
+    if re2 is None or "\\" in replacement:
+        return compiled
+    options = re2.Options()
+    options.encoding = re2.Options.Encoding.LATIN1
+    options.log_errors = False
+    try:
+        return re2.compile(compiled.pattern, options=options)
+    except re2.error:
+        return compiled
+
 
-def _compile_patterns(config: ScrubConfig) -> list[tuple[re.Pattern, str]]:
-    """Compile regex patterns for a config."""
-    return [(re.compile(p), r) for p, r in config.all_patterns]
+@functools.lru_cache(maxsize=16)
+def _hyperscan_db(patterns: tuple[tuple[str, str], ...]):
+    """Compile the built-in patterns among patterns into one Hyperscan database.
+
+    Match ids are indices into patterns. Returns (database, lock), or None
+    when Hyperscan is unavailable or there is nothing to compile. Databases
+    share one scratch space, so scans are serialized with the lock.
+    """
+    if hyperscan is None:
+        return None
+    ids = [i for i, (p, _) in enumerate(patterns) if p in _TRIGGERS]
+    if not ids:
+        return None
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=[patterns[i][0].encode("utf-8") for i in ids],
+            ids=ids,
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(ids),
+        )
+    except hyperscan.error:
+        return None
+    return db, threading.Lock()
+
+
+def _matching_patterns(compiled: _CompiledPatterns, data: bytes) -> set[int]:
+    """Indices of the config patterns that may occur in data.
+
+    These are the built-in patterns that actually match (with Hyperscan)
+    or whose trigger literals are present, plus every user pattern.
+    """
+    if compiled.hyperscan is None:
+        return {
+            i for i, triggers in enumerate(compiled.triggers)
+            if triggers is None or any(t in data for t in triggers)
+        }
+    db, lock = compiled.hyperscan
+    hits = set(compiled.unfiltered)
+
+    def on_match(pattern_id, start, end, flags, context):
+        hits.add(pattern_id)
+
+    with lock:
+        db.scan(data, match_event_handler=on_match)
+    return hits
+
+
+def _splice(pattern, replacement: bytes, data: bytes) -> tuple[bytes, int]:
+    """Replace every match of an RE2 pattern in one output buffer.
+
+    RE2's subn is a Python loop that collects the pieces in a list and
+    joins them; copying unmatched spans straight from a memoryview into
+    a bytearray skips the intermediate slices.
+    """
+    view = memoryview(data)
+    out = bytearray()
+    pos = replaced = 0
+    for m in pattern.finditer(data):
+        start, end = m.span()
+        out += view[pos:start]
+        out += replacement
+        pos = end
+        replaced += 1
+    if not replaced:
+        return data, 0
+    out += view[pos:]
+    return bytes(out), replaced
+
+
+# Shared by every scrub_bytes(..., config=None) call
+_DEFAULT_CONFIG = ScrubConfig()
 
 
 def scrub_bytes(data: bytes, config: ScrubConfig | None = None) -> bytes:
@@ -79,23 +254,55 @@ def scrub_bytes(data: bytes, config: ScrubConfig | None = None) -> bytes:
         config: Scrub configuration. Uses defaults if None.
 
     Returns:
-        Scrubbed bytes with sensitive values replaced.
+        Scrubbed bytes with sensitive values replaced. When nothing needs
+        redacting, `data` itself is returned (no copy).
     """
     if config is None:
-        config = ScrubConfig()
+        config = _DEFAULT_CONFIG
+
+    compiled = config._compiled()
+    hits = _matching_patterns(compiled, data)
+    if not hits and not compiled.custom:
+        return data
 
-    text = data.decode("utf-8", errors="replace")
+    scrubbed = data
+    replaced = 0
 
-    # Apply regex patterns
-    compiled = _compile_patterns(config)
-    for pattern, replacement in compiled:
-        text = pattern.sub(replacement, text)
+    # Apply regex patterns in list order, which sets priority (Anthropic
+    # keys before generic sk- keys). User patterns share one decoded copy
+    # until the next built-in pattern needs bytes again.
+    text = None
+    text_replaced = 0
+    for i, (pattern, replacement) in enumerate(compiled.compiled):
+        if i not in hits:
+            continue
+        if isinstance(replacement, str):
+            if text is None:
+                text = scrubbed.decode("utf-8", errors="surrogateescape")
+            text, n = pattern.subn(replacement, text)
+            text_replaced += n
+        else:
+            if text is not None:
+                if text_replaced:
+                    scrubbed = text.encode("utf-8", errors="surrogateescape")
+                text, text_replaced = None, 0
+            if isinstance(pattern, re.Pattern):
+                scrubbed, n = pattern.subn(replacement, scrubbed)
+            else:
+                scrubbed, n = _splice(pattern, replacement, scrubbed)
+        replaced += n
+    if text_replaced:
+        scrubbed = text.encode("utf-8", errors="surrogateescape")
 
     # Apply exact string replacements
-    for original, replacement in config.custom_strings:
-        text = text.replace(original, replacement)
+    for original, replacement in compiled.custom:
+        if original in scrubbed:
+            scrubbed = scrubbed.replace(original, replacement)
+            replaced += 1
 
-    return text.encode("utf-8")
+    if not replaced:
+        return data
+    return scrubbed
 
 
 def scrub_text(text: str, config: ScrubConfig | None = None) -> str:
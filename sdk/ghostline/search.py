@@ -1,15 +1,20 @@
 """Semantic search across .ghostline replay frames.
 
 Uses zvec (alibaba/zvec) when available for production-grade vector search.
-Falls back to numpy cosine similarity for environments where zvec isn't installed.
+Otherwise uses a FAISS inner-product index when faiss is installed, and
+falls back to numpy cosine similarity when neither is.
 
 Embedding strategy: TF-IDF-like bag of tokens from request/response text content.
 For richer embeddings, pass a custom `embed_fn` that returns float vectors.
 """
 
 import hashlib
+import inspect
 import json
 import os
+import sqlite3
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Sequence
 
 import numpy as np
@@ -29,13 +34,14 @@ def _default_embed(text: str) -> np.ndarray:
     Projects each token into a fixed-dimension vector using feature hashing.
     Not as good as a real embedding model, but works offline with zero setup.
     """
-    vec = np.zeros(_DEFAULT_DIM, dtype=np.float32)
-    tokens = text.lower().split()
-    for token in tokens:
-        h = int(hashlib.md5(token.encode()).hexdigest(), 16)
-        idx = h % _DEFAULT_DIM
-        sign = 1.0 if (h >> 128) % 2 == 0 else -1.0
-        vec[idx] += sign
+    counts = Counter(text.lower().split())
+    # One 64-bit hash per distinct token: low bits pick the slot, the top bit the sign
+    digest = b"".join([hashlib.blake2b(t.encode(), digest_size=8).digest() for t in counts])
+    hashes = np.frombuffer(digest, dtype="<u8")
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    weights[(hashes >> np.uint64(63)).astype(bool)] *= -1
+    slots = (hashes % np.uint64(_DEFAULT_DIM)).astype(np.intp)
+    vec = np.bincount(slots, weights=weights, minlength=_DEFAULT_DIM).astype(np.float32)
     # L2 normalize
     norm = np.linalg.norm(vec)
     if norm > 0:
@@ -43,6 +49,108 @@ def _default_embed(text: str) -> np.ndarray:
     return vec
 
 
+def _unit(vec: np.ndarray) -> np.ndarray:
+    """Return vec as float32 scaled to unit L2 norm (zero vectors unchanged)."""
+    vec = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+# Rows dequantized per matrix-vector product when scoring an int8 index
+_DEQUANT_BLOCK = 16384
+
+# Characters of frame text kept in memory for result previews
+_PREVIEW_CHARS = 200
+
+# Above this many frames FAISS search switches from exact to HNSW
+_HNSW_MIN_FRAMES = 50_000
+_HNSW_M = 32
+_HNSW_EF_CONSTRUCTION = 200
+_HNSW_EF_SEARCH = 64
+
+
+def _grow(buf: np.ndarray | None, rows: int, row_shape: tuple = (), dtype=np.float32) -> np.ndarray:
+    """Return a buffer with room for at least `rows` rows of `row_shape`.
+
+    Capacity at least doubles, so appending N rows copies O(N) rows.
+    """
+    if buf is None:
+        return np.empty((rows, *row_shape), dtype=dtype)
+    grown = np.empty((max(rows, 2 * len(buf)), *buf.shape[1:]), dtype=buf.dtype)
+    grown[: len(buf)] = buf
+    return grown
+
+
+class _EmbedCache:
+    """Embeddings persisted in SQLite, keyed by namespace and text.
+
+    Vectors are stored already normalized, as float32 bytes, with their
+    dimension. The namespace identifies the embedder, so changing what it
+    computes without changing the namespace requires a new cache file.
+    """
+
+    # Stay under SQLite's default limit on host parameters per statement
+    _BATCH = 500
+
+    def __init__(self, path: str, namespace: str):
+        self._namespace = namespace.encode("utf-8")
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors"
+            " (key BLOB PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+
+    @staticmethod
+    def namespace_for(embed_fn: EmbedFn) -> str:
+        """Module and qualified name of embed_fn, which must be unique to it.
+
+        Lambdas all share one qualified name, as do closures from one factory
+        and a method bound to differently configured instances; partials and
+        callable instances have none. Those need an explicit namespace.
+        """
+        qualname = getattr(embed_fn, "__qualname__", None)
+        if (
+            not isinstance(qualname, str)
+            or "<lambda>" in qualname
+            or "<locals>" in qualname
+            or inspect.ismethod(embed_fn)
+        ):
+            raise ValueError(
+                f"cannot derive a cache namespace from {embed_fn!r}; "
+                "pass embed_cache_namespace"
+            )
+        return f"{embed_fn.__module__}.{qualname}"
+
+    def key(self, text: str) -> bytes:
+        h = hashlib.blake2b(self._namespace, digest_size=32)
+        h.update(b"\0")
+        h.update(text.encode("utf-8", errors="surrogatepass"))
+        return h.digest()
+
+    def get_many(self, keys: Sequence[bytes], dim: int | None = None) -> dict[bytes, np.ndarray]:
+        """Cached vectors for keys, skipping any whose dimension is not dim."""
+        found = {}
+        for start in range(0, len(keys), self._BATCH):
+            batch = keys[start : start + self._BATCH]
+            rows = self._conn.execute(
+                "SELECT key, dim, vector FROM vectors"
+                f" WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for key, stored_dim, blob in rows:
+                if (dim is None or stored_dim == dim) and len(blob) == stored_dim * 4:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Sequence[tuple[bytes, np.ndarray]]):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (key, dim, vector) VALUES (?, ?, ?)",
+                [(key, len(vec), vec.tobytes()) for key, vec in items],
+            )
+
+
 def _frame_to_text(frame: Frame) -> str:
     """Extract searchable text from a frame."""
     parts = []
@@ -63,66 +171,206 @@ def _frame_to_text(frame: Frame) -> str:
 class GhostlineIndex:
     """Searchable index over frames in one or more .ghostline files.
 
+    Vectors from `embed_fn` are L2-normalized on the way in, as are query
+    vectors, so scores are cosine similarities whatever the embedder.
+
+    With `quantize=True` each vector is stored as int8 with a per-row
+    scale: a quarter of the memory, at the cost of slightly approximate
+    scores and slower numpy scoring (rows are dequantized in blocks).
+
+    With `parallel=True`, add_file decodes frames and calls `embed_fn` on
+    a thread pool. This pays off for embedders that release the GIL or
+    wait on I/O (e.g. a remote embedding API); `embed_fn` must then be
+    thread-safe. The default hash embedder is mostly pure Python and
+    gains little.
+
+    With `embed_cache_path`, vectors are cached in a SQLite file keyed by
+    the embedder and the frame text, so re-indexing a recording only
+    embeds frames that were not seen before. The embedder is identified
+    by `embed_cache_namespace`, or by default by its module and qualified
+    name; lambdas, closures, bound methods, partials and callable
+    instances need the namespace.
+
     Attributes:
         entries: List of (file_path, frame_index, frame, text) tuples.
     """
 
-    def __init__(self, embed_fn: EmbedFn | None = None):
+    def __init__(
+        self,
+        embed_fn: EmbedFn | None = None,
+        quantize: bool = False,
+        parallel: bool = False,
+        embed_cache_path: str | None = None,
+        embed_cache_namespace: str | None = None,
+    ):
         self._embed_fn = embed_fn or _default_embed
-        self._texts: list[str] = []
-        self._vectors: list[np.ndarray] = []
+        self._cache = None
+        if embed_cache_path:
+            namespace = embed_cache_namespace or _EmbedCache.namespace_for(self._embed_fn)
+            self._cache = _EmbedCache(embed_cache_path, namespace)
+        self._quantize = quantize
+        self._parallel = parallel
+        # Only a preview of each frame's text is kept; see get_full_text()
+        self._previews: list[str] = []
+        # Row buffer; the first _n rows hold the indexed vectors
+        self._matrix: np.ndarray | None = None
+        self._scales: np.ndarray | None = None  # per-row scale when quantized
+        self._n = 0
         self._meta: list[tuple[str, int]] = []  # (file_path, frame_idx)
         self._zvec_collection = None
+        self._faiss_index = None
+        self._last_built = 0  # rows already added to the zvec/FAISS index
 
     def add_file(self, path: str) -> int:
         """Index all frames from a .ghostline file. Returns number of frames added."""
-        with open(path, "rb") as f:
-            reader = GhostlineReader(f)
-            count = 0
-            for i in range(reader.frame_count):
-                frame = reader.get_frame(i)
-                text = _frame_to_text(frame)
-                vec = self._embed_fn(text)
-                self._texts.append(text)
-                self._vectors.append(vec)
-                self._meta.append((path, i))
-                count += 1
+        workers = (os.cpu_count() or 1) if self._parallel else 1
+        with open(path, "rb") as f, GhostlineReader(f) as reader:
+            texts = [_frame_to_text(frame) for frame in reader.iter_frames(workers)]
+        for i, (text, vec) in enumerate(zip(texts, self._embed_texts(texts, workers))):
+            self._add_vector(vec, len(texts) - i)
+            self._previews.append(text[:_PREVIEW_CHARS])
+            self._meta.append((path, i))
         self._build_index()
-        return count
+        return len(texts)
+
+    def _embed_texts(self, texts: list[str], workers: int) -> list[np.ndarray]:
+        """Unit vectors for texts, from the cache where possible."""
+        vectors: list[np.ndarray | None] = [None] * len(texts)
+        keys: list[bytes] = []
+        dim = self._matrix.shape[1] if self._matrix is not None else None
+        if self._cache is not None:
+            keys = [self._cache.key(text) for text in texts]
+            cached = self._cache.get_many(keys, dim)
+            for i, key in enumerate(keys):
+                vectors[i] = cached.get(key)
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        if self._cache is not None and dim is None and texts and not missing:
+            # Nothing indexed yet to check cached vectors against: embed one
+            # text to learn the embedder's dimension
+            missing = [0]
+        self._embed_into(vectors, texts, missing, workers)
+
+        stale = []
+        if self._cache is not None and dim is None and missing:
+            dim = len(vectors[missing[0]])
+            stale = [i for i, vec in enumerate(vectors) if len(vec) != dim]
+            self._embed_into(vectors, texts, stale, workers)
+
+        if self._cache is not None and (missing or stale):
+            self._cache.put_many([(keys[i], vectors[i]) for i in missing + stale])
+        return vectors
+
+    def _embed_into(
+        self, vectors: list[np.ndarray | None], texts: list[str], indices: list[int], workers: int
+    ):
+        """Embed texts[i] into vectors[i] for each i in indices."""
+        pending = [texts[i] for i in indices]
+        if workers > 1 and len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                embedded = list(pool.map(self._embed_fn, pending))
+        else:
+            embedded = [self._embed_fn(text) for text in pending]
+        for i, vec in zip(indices, embedded):
+            vectors[i] = _unit(vec)
+
+    def _add_vector(self, vec: np.ndarray, pending: int):
+        """Store vec in the next row, reserving room for `pending` vectors."""
+        if self._matrix is None or self._n == len(self._matrix):
+            rows = self._n + pending
+            if self._quantize:
+                self._matrix = _grow(self._matrix, rows, vec.shape, np.int8)
+                self._scales = _grow(self._scales, rows)
+            else:
+                self._matrix = _grow(self._matrix, rows, vec.shape)
+        if self._quantize:
+            scale = float(np.abs(vec).max()) / 127 or 1.0
+            self._matrix[self._n] = np.round(vec / scale)
+            self._scales[self._n] = scale
+        else:
+            self._matrix[self._n] = vec
+        self._n += 1
+
+    def _vectors(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Indexed vectors start..stop as float32 (dequantized if needed)."""
+        stop = self._n if stop is None else min(stop, self._n)
+        rows = self._matrix[start:stop]
+        if not self._quantize:
+            return rows
+        return rows.astype(np.float32) * self._scales[start:stop, None]
+
+    def _scores(self, q_vec: np.ndarray) -> np.ndarray:
+        """Cosine similarity of q_vec with every indexed vector."""
+        if not self._quantize:
+            return self._matrix[: self._n] @ q_vec
+        scores = np.empty(self._n, dtype=np.float32)
+        for start in range(0, self._n, _DEQUANT_BLOCK):
+            stop = min(start + _DEQUANT_BLOCK, self._n)
+            rows = self._matrix[start:stop].astype(np.float32)
+            scores[start:stop] = (rows @ q_vec) * self._scales[start:stop]
+        return scores
 
     def _build_index(self):
-        """Build or rebuild the search index."""
-        if not self._vectors:
+        """Add vectors indexed since the last build to the search index."""
+        if self._last_built == self._n:
             return
 
         # Try zvec first
         try:
             import zvec
-            dim = len(self._vectors[0])
-            self._zvec_collection = zvec.Collection(
-                name="ghostline_search",
-                dimension=dim,
-                metric="cosine",
-            )
-            for i, vec in enumerate(self._vectors):
+            if self._zvec_collection is None:
+                self._zvec_collection = zvec.Collection(
+                    name="ghostline_search",
+                    dimension=self._matrix.shape[1],
+                    metric="cosine",
+                )
+            new_rows = self._vectors(self._last_built)
+            for i, vec in enumerate(new_rows, start=self._last_built):
                 self._zvec_collection.add(
                     id=str(i),
                     vector=vec.tolist(),
                     metadata={"file": self._meta[i][0], "frame": self._meta[i][1]},
                 )
         except ImportError:
-            # Fallback to numpy — stack vectors for batch cosine similarity
-            self._matrix = np.stack(self._vectors)
+            self._add_to_faiss()
+        self._last_built = self._n
+
+    def _add_to_faiss(self):
+        """Add new rows to a FAISS inner-product index, if FAISS is installed.
+
+        The index is exact (flat) up to _HNSW_MIN_FRAMES rows and rebuilt
+        as an approximate HNSW graph once the corpus grows past that.
+        Quantized indexes stay on numpy: a float FAISS copy would undo the
+        memory saving. Without FAISS, search reads the row buffer directly.
+        """
+        if self._quantize:
+            return
+        try:
+            import faiss
+        except ImportError:
+            return
+        dim = self._matrix.shape[1]
+        start = self._last_built
+        if self._n > _HNSW_MIN_FRAMES and not isinstance(self._faiss_index, faiss.IndexHNSW):
+            self._faiss_index = faiss.IndexHNSWFlat(dim, _HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            self._faiss_index.hnsw.efConstruction = _HNSW_EF_CONSTRUCTION
+            start = 0
+        elif self._faiss_index is None:
+            self._faiss_index = faiss.IndexFlatIP(dim)
+        self._faiss_index.add(np.ascontiguousarray(self._matrix[start : self._n]))
 
-    def search(self, query: str, k: int = 5) -> list[dict]:
+    def search(self, query: str, k: int = 5, ef_search: int | None = None) -> list[dict]:
         """Search for frames matching a natural language query.
 
+        ef_search sets how many candidates an HNSW search explores (higher
+        is slower but more accurate); it only matters for large FAISS
+        indexes and defaults to max(64, k).
+
         Returns list of dicts with keys: file, frame_idx, score, text_preview.
         """
-        if not self._vectors:
+        if not self._n:
             return []
 
-        q_vec = self._embed_fn(query)
+        q_vec = _unit(self._embed_fn(query))
 
         # Try zvec
         if self._zvec_collection is not None:
@@ -131,41 +379,52 @@ class GhostlineIndex:
                     vector=q_vec.tolist(),
                     top_k=k,
                 )
-                return [
-                    {
-                        "file": self._meta[int(r.id)][0],
-                        "frame_idx": self._meta[int(r.id)][1],
-                        "score": float(r.score),
-                        "text_preview": self._texts[int(r.id)][:200],
-                    }
-                    for r in results
-                ]
+                return [self._result(int(r.id), r.score) for r in results]
             except Exception:
                 pass
 
-        # Numpy fallback: cosine similarity
-        scores = self._matrix @ q_vec
+        # FAISS: inner product (= cosine on unit vectors) with its own top-k
+        if self._faiss_index is not None:
+            if k <= 0:
+                return []
+            if hasattr(self._faiss_index, "hnsw"):
+                self._faiss_index.hnsw.efSearch = ef_search or max(_HNSW_EF_SEARCH, k)
+            scores, ids = self._faiss_index.search(q_vec.reshape(1, -1), min(k, self._n))
+            return [self._result(int(i), s) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+        # Numpy fallback: rows and query are unit vectors, so one
+        # matrix-vector product gives the cosine similarities
+        scores = self._scores(q_vec)
         top_k = min(k, len(scores))
-        if top_k >= len(scores):
-            indices = np.argsort(-scores)
-        else:
-            indices = np.argpartition(-scores, top_k)[:top_k]
-            indices = indices[np.argsort(-scores[indices])]
-
-        return [
-            {
-                "file": self._meta[i][0],
-                "frame_idx": self._meta[i][1],
-                "score": float(scores[i]),
-                "text_preview": self._texts[i][:200],
-            }
-            for i in indices
-        ]
+        if top_k <= 0:
+            return []
+        # O(N) selection, then sort only the k winners
+        indices = np.argpartition(scores, -top_k)[-top_k:]
+        indices = indices[np.argsort(-scores[indices])]
+
+        return [self._result(i, scores[i]) for i in indices]
+
+    def _result(self, i: int, score) -> dict:
+        return {
+            "file": self._meta[i][0],
+            "frame_idx": self._meta[i][1],
+            "score": float(score),
+            "text_preview": self._previews[i],
+        }
+
+    def get_full_text(self, result: dict) -> str:
+        """Full searchable text of a search result, re-read from its file."""
+        with open(result["file"], "rb") as f, GhostlineReader(f) as reader:
+            return _frame_to_text(reader.get_frame(result["frame_idx"]))
 
     @property
     def frame_count(self) -> int:
-        return len(self._vectors)
+        return self._n
 
     @property
     def using_zvec(self) -> bool:
         return self._zvec_collection is not None
+
+    @property
+    def using_faiss(self) -> bool:
+        return self._faiss_index is not None
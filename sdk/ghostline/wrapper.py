@@ -4,21 +4,30 @@ import json
 import time
 import hashlib
 from functools import wraps
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
 
-from ghostline.recorder import GhostlineRecorder
-from ghostline.replayer import GhostlineReplayer
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Only needed for annotations; wrapping a client must not load the format stack
+if TYPE_CHECKING:
+    from ghostline.recorder import GhostlineRecorder
+    from ghostline.replayer import GhostlineReplayer
 
 # Thread-local active session
-_active_recorder: GhostlineRecorder | None = None
-_active_replayer: GhostlineReplayer | None = None
+_active_recorder: "GhostlineRecorder | None" = None
+_active_replayer: "GhostlineReplayer | None" = None
 
 
-def set_recorder(recorder: GhostlineRecorder | None):
+def set_recorder(recorder: "GhostlineRecorder | None"):
     global _active_recorder
     _active_recorder = recorder
 
 
-def set_replayer(replayer: GhostlineReplayer | None):
+def set_replayer(replayer: "GhostlineReplayer | None"):
     global _active_replayer
     _active_replayer = replayer
 
@@ -53,40 +62,68 @@ def wrap(client):
 
 def _serialize_request(kwargs: dict) -> bytes:
     """Serialize API call kwargs to stable bytes for hashing."""
-    # Sort keys for deterministic serialization
+    # Sort keys for deterministic serialization. The exact bytes are the
+    # replay key, so this must stay stdlib json: orjson's output differs
+    # (separators, non-ASCII escaping) and would orphan every recording.
     return json.dumps(kwargs, sort_keys=True, default=str).encode()
 
 
+def _request_hash(req_bytes: bytes) -> bytes:
+    """Replay key for serialized request bytes.
+
+    SHA-256, as in Frame.hash_bytes and the Rust writer; hashed once per
+    call and reused for the miss message.
+    """
+    return hashlib.sha256(req_bytes).digest()
+
+
+def _serialize_response(response) -> bytes:
+    """Serialize an API response for recording.
+
+    This stays stdlib json even with orjson installed: the scrub patterns
+    are ASCII, and only json.dumps escapes non-ASCII text (an address like
+    Zoë@corp.io would otherwise reach disk unredacted).
+    """
+    return json.dumps(response.model_dump(), default=str).encode()
+
+
+def _load_response(cached: bytes):
+    """Parse recorded response bytes."""
+    if orjson is not None:
+        try:
+            return orjson.loads(cached)
+        except ValueError:
+            pass  # e.g. NaN written by stdlib json
+    return json.loads(cached)
+
+
 def _wrap_anthropic(client):
     """Monkey-patch anthropic.Anthropic.messages.create."""
     original_create = client.messages.create
 
     @wraps(original_create)
     def patched_create(*args, **kwargs):
+        replayer, recorder = _active_replayer, _active_recorder
         # Replay mode: serve from cache
-        if _active_replayer is not None:
-            req_bytes = _serialize_request(kwargs)
-            cached = _active_replayer.lookup(req_bytes)
+        if replayer is not None:
+            req_hash = _request_hash(_serialize_request(kwargs))
+            cached = replayer.lookup_hash(req_hash)
             if cached is not None:
                 # Reconstruct the response object
-                data = json.loads(cached)
-                return _reconstruct_anthropic_response(data)
+                return _reconstruct_anthropic_response(cached)
             # Fall through to real API if miss (or raise)
-            raise LookupError(
-                f"no cached response for request hash "
-                f"{hashlib.sha256(req_bytes).hexdigest()[:16]}"
-            )
+            raise LookupError(f"no cached response for request hash {req_hash.hex()[:16]}")
 
         # Record mode: call real API and capture
-        if _active_recorder is not None:
+        if recorder is not None:
             req_bytes = _serialize_request(kwargs)
             t0 = time.monotonic()
             response = original_create(*args, **kwargs)
             latency_ms = int((time.monotonic() - t0) * 1000)
 
             # Serialize response
-            resp_bytes = json.dumps(response.model_dump(), default=str).encode()
-            _active_recorder.capture(req_bytes, resp_bytes, latency_ms)
+            resp_bytes = _serialize_response(response)
+            recorder.capture(req_bytes, resp_bytes, latency_ms)
             return response
 
         # No active session — pass through
@@ -101,24 +138,21 @@ def _wrap_openai(client):
 
     @wraps(original_create)
     def patched_create(*args, **kwargs):
-        if _active_replayer is not None:
-            req_bytes = _serialize_request(kwargs)
-            cached = _active_replayer.lookup(req_bytes)
+        replayer, recorder = _active_replayer, _active_recorder
+        if replayer is not None:
+            req_hash = _request_hash(_serialize_request(kwargs))
+            cached = replayer.lookup_hash(req_hash)
             if cached is not None:
-                data = json.loads(cached)
-                return _reconstruct_openai_response(data)
-            raise LookupError(
-                f"no cached response for request hash "
-                f"{hashlib.sha256(req_bytes).hexdigest()[:16]}"
-            )
-
-        if _active_recorder is not None:
+                return _reconstruct_openai_response(cached)
+            raise LookupError(f"no cached response for request hash {req_hash.hex()[:16]}")
+
+        if recorder is not None:
             req_bytes = _serialize_request(kwargs)
             t0 = time.monotonic()
             response = original_create(*args, **kwargs)
             latency_ms = int((time.monotonic() - t0) * 1000)
-            resp_bytes = json.dumps(response.model_dump(), default=str).encode()
-            _active_recorder.capture(req_bytes, resp_bytes, latency_ms)
+            resp_bytes = _serialize_response(response)
+            recorder.capture(req_bytes, resp_bytes, latency_ms)
             return response
 
         return original_create(*args, **kwargs)
@@ -132,24 +166,21 @@ def _wrap_litellm(module):
 
     @wraps(original_completion)
     def patched_completion(*args, **kwargs):
-        if _active_replayer is not None:
-            req_bytes = _serialize_request(kwargs)
-            cached = _active_replayer.lookup(req_bytes)
+        replayer, recorder = _active_replayer, _active_recorder
+        if replayer is not None:
+            req_hash = _request_hash(_serialize_request(kwargs))
+            cached = replayer.lookup_hash(req_hash)
             if cached is not None:
-                data = json.loads(cached)
-                return _reconstruct_openai_response(data)
-            raise LookupError(
-                f"no cached response for request hash "
-                f"{hashlib.sha256(req_bytes).hexdigest()[:16]}"
-            )
-
-        if _active_recorder is not None:
+                return _reconstruct_openai_response(cached)
+            raise LookupError(f"no cached response for request hash {req_hash.hex()[:16]}")
+
+        if recorder is not None:
             req_bytes = _serialize_request(kwargs)
             t0 = time.monotonic()
             response = original_completion(*args, **kwargs)
             latency_ms = int((time.monotonic() - t0) * 1000)
-            resp_bytes = json.dumps(response.model_dump(), default=str).encode()
-            _active_recorder.capture(req_bytes, resp_bytes, latency_ms)
+            resp_bytes = _serialize_response(response)
+            recorder.capture(req_bytes, resp_bytes, latency_ms)
             return response
 
         return original_completion(*args, **kwargs)
@@ -157,42 +188,40 @@ def _wrap_litellm(module):
     module.completion = patched_completion
 
 
-def _reconstruct_anthropic_response(data: dict):
-    """Reconstruct an Anthropic Message from cached dict."""
+def _reconstruct_anthropic_response(cached: bytes):
+    """Reconstruct an Anthropic Message from cached response bytes."""
     try:
         from anthropic.types import Message
-        return Message(**data)
+        return Message(**_load_response(cached))
     except Exception:
-        # Fallback: return raw dict wrapped in a simple namespace
-        return _DictNamespace(data)
+        # Fallback: attribute access over the raw JSON
+        return _load_namespace(cached)
 
 
-def _reconstruct_openai_response(data: dict):
-    """Reconstruct an OpenAI ChatCompletion from cached dict."""
+def _reconstruct_openai_response(cached: bytes):
+    """Reconstruct an OpenAI ChatCompletion from cached response bytes."""
     try:
         from openai.types.chat import ChatCompletion
-        return ChatCompletion(**data)
+        return ChatCompletion(**_load_response(cached))
     except Exception:
-        return _DictNamespace(data)
+        return _load_namespace(cached)
+
+
+class _Namespace(SimpleNamespace):
+    """Attribute access on a cached response no client model accepted."""
 
+    def model_dump(self) -> dict:
+        return _plain(self)
 
-class _DictNamespace:
-    """Simple namespace that allows attribute access on a dict."""
 
-    def __init__(self, data: dict):
-        self._data = data
-        for k, v in data.items():
-            if isinstance(v, dict):
-                setattr(self, k, _DictNamespace(v))
-            elif isinstance(v, list):
-                setattr(self, k, [
-                    _DictNamespace(i) if isinstance(i, dict) else i for i in v
-                ])
-            else:
-                setattr(self, k, v)
+def _plain(value):
+    if isinstance(value, _Namespace):
+        return {k: _plain(v) for k, v in vars(value).items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
 
-    def __repr__(self):
-        return f"DictNamespace({self._data})"
 
-    def model_dump(self):
-        return self._data
+def _load_namespace(cached: bytes) -> _Namespace:
+    """Parse cached JSON straight into nested namespaces, one per object."""
+    return json.loads(cached, object_hook=lambda d: _Namespace(**d))
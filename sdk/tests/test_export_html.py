@@ -0,0 +1,87 @@
+"""Tests for standalone HTML export."""
+
+import base64
+import os
+import re
+import tempfile
+import warnings
+
+import pytest
+
+from ghostline.export_html import _load_viewer_assets, export_html
+from ghostline.format import Frame, GhostlineWriter
+
+
+def _make_test_file(frame_count: int, dict_data: bytes | None = None) -> str:
+    path = tempfile.mktemp(suffix=".ghostline")
+    with open(path, "wb") as f:
+        writer = GhostlineWriter(f, started_at=1700000000000, dict_data=dict_data)
+        for i in range(frame_count):
+            # Incompressible payloads so the file spans several read chunks
+            writer.append(Frame(os.urandom(1024), os.urandom(1024), 10, i))
+        writer.finish()
+    return path
+
+
+def _export(path: str) -> str:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return export_html(path)
+
+
+def test_export_embeds_recording():
+    path = _make_test_file(100)
+    html_path = _export(path)
+    try:
+        assert html_path == path.removesuffix(".ghostline") + ".html"
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+        filename = os.path.basename(path)
+        assert f"<title>Ghostline — {filename}</title>" in html
+
+        match = re.search(
+            r'<script id="ghostline-data" type="application/octet-stream" '
+            r'data-filename="[^"]+">([^<]*)</script>',
+            html,
+        )
+        assert match is not None
+        with open(path, "rb") as f:
+            assert base64.b64decode(match.group(1)) == f.read()
+    finally:
+        os.unlink(path)
+        os.unlink(html_path)
+
+
+def test_export_warns_about_secrets():
+    path = _make_test_file(1)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            html_path = export_html(path)
+        assert any("scrub=True" in str(w.message) for w in caught)
+        os.unlink(html_path)
+    finally:
+        os.unlink(path)
+
+
+def test_export_reuses_viewer_assets():
+    path = _make_test_file(1)
+    try:
+        _export(path)
+        hits = _load_viewer_assets.cache_info().hits
+        html_path = _export(path)
+        assert _load_viewer_assets.cache_info().hits == hits + 1
+        os.unlink(html_path)
+    finally:
+        os.unlink(path)
+
+
+def test_export_rejects_dictionary_recordings():
+    path = _make_test_file(1, dict_data=b"\x00" * 64)
+    html_path = path.removesuffix(".ghostline") + ".html"
+    try:
+        with pytest.raises(ValueError, match="compression dictionary"):
+            _export(path)
+        assert not os.path.exists(html_path)
+    finally:
+        os.unlink(path)
@@ -1,9 +1,25 @@
 """Tests for the .ghostline binary format (Python implementation)."""
 
+import hashlib
 import io
+import os
+import struct
 import tempfile
 
-from ghostline.format import Frame, GhostlineWriter, GhostlineReader, fork
+import msgpack
+import pytest
+import zstandard as zstd
+
+from ghostline.format import (
+    DICT_FORMAT_VERSION,
+    FORMAT_VERSION,
+    Frame,
+    GhostlineReader,
+    GhostlineWriter,
+    _hash_and_response,
+    fork,
+    train_dictionary,
+)
 
 
 def test_frame_roundtrip():
@@ -17,6 +33,32 @@ def test_frame_roundtrip():
     assert unpacked.request_hash == frame.request_hash
 
 
+def test_frame_from_legacy_layouts():
+    frame = Frame(b"request", b"response", 42, 1700000000000)
+    # Map layout written by earlier SDK versions
+    legacy = msgpack.packb({
+        "request_hash": frame.request_hash,
+        "request_bytes": b"request",
+        "response_bytes": b"response",
+        "latency_ms": 42,
+        "timestamp": 1700000000000,
+    })
+    # rmp_serde writes byte arrays as lists of ints
+    rust = msgpack.packb([list(frame.request_hash), list(b"request"), list(b"response"), 42, 1700000000000])
+    for data in (legacy, rust):
+        unpacked = Frame.from_msgpack(data)
+        assert unpacked.request_hash == frame.request_hash
+        assert unpacked.request_bytes == b"request"
+        assert unpacked.response_bytes == b"response"
+        assert unpacked.latency_ms == 42
+        assert _hash_and_response(data) == (frame.request_hash, b"response")
+
+
+def test_frame_hash_bytes():
+    assert Frame.hash_bytes(b"request") == hashlib.sha256(b"request").digest()
+    assert Frame.hash_bytes(bytearray(b"request")) == Frame(b"request", b"", 0, 0).request_hash
+
+
 def test_write_read_roundtrip():
     buf = io.BytesIO()
     writer = GhostlineWriter(buf, started_at=1700000000000)
@@ -56,6 +98,56 @@ def test_lookup_by_hash():
     assert reader.lookup_by_hash(b"\x00" * 32) is None
 
 
+def test_lookup_by_hash_returns_first_duplicate():
+    buf = io.BytesIO()
+    writer = GhostlineWriter(buf, started_at=0)
+    writer.append(Frame(b"same", b"first", 1, 1))
+    writer.append(Frame(b"same", b"second", 2, 2))
+    writer.finish()
+
+    buf.seek(0)
+    reader = GhostlineReader(buf)
+    found = reader.lookup_by_hash(Frame(b"same", b"", 0, 0).request_hash)
+    assert found.response_bytes == b"first"
+
+
+def test_read_frame_without_content_size():
+    """Frames from streaming zstd encoders carry no content size."""
+    frame = Frame(b"streamed", b"ok", 1, 1)
+    cobj = zstd.ZstdCompressor(write_content_size=False).compressobj()
+    compressed = cobj.compress(frame.to_msgpack()) + cobj.flush()
+
+    buf = io.BytesIO()
+    writer = GhostlineWriter(buf, started_at=0)
+    offset = buf.tell()
+    buf.write(struct.pack("<I", len(compressed)) + compressed)
+    writer._offset += 4 + len(compressed)
+    writer._index.append((frame.request_hash, offset))
+    writer.finish()
+
+    buf.seek(0)
+    reader = GhostlineReader(buf)
+    assert reader.get_frame(0).request_bytes == b"streamed"
+
+
+def test_dedupe_shares_identical_frames():
+    plain, deduped = io.BytesIO(), io.BytesIO()
+    for buf, dedupe in ((plain, False), (deduped, True)):
+        writer = GhostlineWriter(buf, started_at=0, dedupe=dedupe)
+        writer.append(Frame(b"same" * 100, b"answer", 1, 1))
+        writer.append(Frame(b"same" * 100, b"answer", 2, 2))
+        writer.append(Frame(b"same" * 100, b"different answer", 3, 3))
+        writer.finish()
+    assert len(deduped.getvalue()) < len(plain.getvalue())
+
+    deduped.seek(0)
+    reader = GhostlineReader(deduped)
+    assert reader.frame_count == 3
+    assert reader.get_frame(1).response_bytes == b"answer"
+    assert reader.get_frame(1).latency_ms == 1  # shares the first frame
+    assert reader.get_frame(2).response_bytes == b"different answer"
+
+
 def test_iteration():
     buf = io.BytesIO()
     writer = GhostlineWriter(buf, started_at=0)
@@ -70,6 +162,50 @@ def test_iteration():
     assert frames[3].request_bytes == b"req3"
 
 
+def test_reader_context_manager_releases_map():
+    path = tempfile.mktemp(suffix=".ghostline")
+    with open(path, "wb") as f:
+        writer = GhostlineWriter(f, started_at=0)
+        writer.append(Frame(b"req", b"res", 1, 0))
+        writer.finish()
+    with open(path, "rb") as f:
+        with GhostlineReader(f) as reader:
+            assert reader.get_frame(0).response_bytes == b"res"
+        with pytest.raises(ValueError):
+            reader.get_frame(0)
+    os.unlink(path)
+
+
+def test_iter_frames_parallel(monkeypatch):
+    monkeypatch.setattr("ghostline.format._DECODE_BATCH_BYTES", 64)
+    buf = io.BytesIO()
+    writer = GhostlineWriter(buf, started_at=0)
+    for i in range(50):
+        writer.append(Frame(f"req{i}".encode(), f"res{i}".encode(), i, i * 1000))
+    writer.finish()
+
+    buf.seek(0)
+    reader = GhostlineReader(buf)
+    frames = list(reader.iter_frames(max_workers=4))
+    assert [f.request_bytes for f in frames] == [f"req{i}".encode() for i in range(50)]
+    assert [f.latency_ms for f in frames] == list(range(50))
+
+
+def test_iter_hash_response():
+    buf = io.BytesIO()
+    writer = GhostlineWriter(buf, started_at=0)
+    frames = [Frame(b"q" * size, b"r" * size, 1, 1) for size in (1, 300, 70000)]
+    for frame in frames:
+        writer.append(frame)
+    writer.finish()
+
+    buf.seek(0)
+    reader = GhostlineReader(buf)
+    assert list(reader.iter_hash_response()) == [
+        (frame.request_hash, frame.response_bytes) for frame in frames
+    ]
+
+
 def test_fork():
     """Test fork creates a new file with parent lineage."""
     with tempfile.NamedTemporaryFile(suffix=".ghostline", delete=False) as f:
@@ -109,6 +245,38 @@ def test_fork_metadata_roundtrip():
     assert reader.frame_count == 1
 
 
+def test_dictionary_roundtrip():
+    """Files written with a trained dictionary are v2 and read back."""
+    def payload(i):
+        return (
+            '{"model": "claude-3-5-sonnet", "system": "You are a careful coding agent.", '
+            f'"messages": [{{"role": "user", "content": "step {i}: refactor module {i * 7}"}}]}}'
+        ).encode()
+
+    with tempfile.NamedTemporaryFile(suffix=".ghostline", delete=False) as f:
+        corpus = f.name
+        writer = GhostlineWriter(f, started_at=0)
+        for i in range(300):
+            writer.append(Frame(payload(i), b'{"content": "done %d"}' % i, 1, i))
+        writer.finish()
+
+    zdict = train_dictionary([corpus], dict_size=4096)
+    buf = io.BytesIO()
+    writer = GhostlineWriter(buf, started_at=0, dict_data=zdict)
+    writer.append(Frame(payload(1000), b"ok", 1, 1))
+    writer.finish()
+
+    buf.seek(0)
+    reader = GhostlineReader(buf)
+    assert reader.version == DICT_FORMAT_VERSION
+    assert reader.dict_data == zdict
+    assert reader.get_frame(0).request_bytes == payload(1000)
+
+    with open(corpus, "rb") as f:
+        assert GhostlineReader(f).version == FORMAT_VERSION
+    os.unlink(corpus)
+
+
 def test_cross_compat_with_rust():
     """Verify Python can read files written by Rust and vice versa.
 
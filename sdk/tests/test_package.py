@@ -0,0 +1,26 @@
+"""Tests for the package namespace."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+_SDK_DIR = Path(__file__).resolve().parents[1]
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=_SDK_DIR, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def test_submodules_reachable_as_attributes():
+    out = _run(
+        "import ghostline\n"
+        "print(ghostline.scrub.ScrubConfig.__name__, ghostline.format.train_dictionary.__name__)"
+    )
+    assert out == "ScrubConfig train_dictionary"
+
+
+def test_import_is_lazy():
+    out = _run("import sys, ghostline\nprint('ghostline.search' in sys.modules)")
+    assert out == "False"
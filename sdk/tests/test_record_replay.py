@@ -3,9 +3,13 @@
 import tempfile
 from pathlib import Path
 
+import pytest
+
+from ghostline import wrapper
+from ghostline.context import record, replay
 from ghostline.recorder import GhostlineRecorder
 from ghostline.replayer import GhostlineReplayer
-from ghostline.format import GhostlineReader
+from ghostline.format import Frame, GhostlineReader
 
 
 def test_recorder_captures_frames():
@@ -50,6 +54,8 @@ def test_replayer_serves_cached():
     result = replayer.lookup(b"my request")
     assert result == b"my response"
     assert replayer.hits == 1
+    assert replayer.lookup_hash(Frame.hash_bytes(b"my request")) == b"my response"
+    assert replayer.hits == 2
 
     result2 = replayer.lookup(b"unknown")
     assert result2 is None
@@ -68,3 +74,50 @@ def test_replayer_context_manager():
     with GhostlineReplayer(path) as rep:
         assert rep.lookup(b"data") == b"cached"
         assert rep.hits == 1
+
+
+def test_replayer_preloads_large_recording(monkeypatch):
+    monkeypatch.setattr("ghostline.replayer._PARALLEL_PRELOAD_MIN_BYTES", 1024)
+    monkeypatch.setattr("ghostline.replayer.os.cpu_count", lambda: 4)
+    with tempfile.NamedTemporaryFile(suffix=".ghostline", delete=False) as f:
+        path = f.name
+
+    with GhostlineRecorder(path, scrub=False) as rec:
+        for i in range(300):
+            rec.capture(f"req{i}".encode(), f"res{i}".encode(), i)
+
+    with GhostlineReplayer(path) as rep:
+        assert rep.lookup(b"req0") == b"res0"
+        assert rep.lookup(b"req299") == b"res299"
+        assert rep.hits == 2
+
+
+def test_record_replay_context_functions():
+    with tempfile.NamedTemporaryFile(suffix=".ghostline", delete=False) as f:
+        path = f.name
+
+    with record(path) as rec:
+        assert wrapper._active_recorder is rec
+        rec.capture(b"ctx request", b"ctx response", 3)
+    assert wrapper._active_recorder is None
+
+    with replay(path) as rep:
+        assert wrapper._active_replayer is rep
+        assert rep.lookup(b"ctx request") == b"ctx response"
+    assert wrapper._active_replayer is None
+
+
+def test_recorder_reports_background_write_errors():
+    with tempfile.NamedTemporaryFile(suffix=".ghostline", delete=False) as f:
+        path = f.name
+
+    recorder = GhostlineRecorder(path, scrub=False)
+    recorder.start()
+    recorder.capture(b"ok", b"fine", 1)
+    recorder.capture(None, b"not hashable", 1)
+    with pytest.raises(RuntimeError, match="failed to write frames"):
+        recorder.stop()
+
+    # Frames written before the failure are still readable
+    with open(path, "rb") as f:
+        assert GhostlineReader(f).frame_count == 1
@@ -1,10 +1,17 @@
 """Tests for semantic search across .ghostline frames."""
 
-import tempfile
+import functools
 import os
+import sys
+import tempfile
+import types
+
+import numpy as np
+import pytest
 
+from ghostline import search
 from ghostline.format import Frame, GhostlineWriter
-from ghostline.search import GhostlineIndex
+from ghostline.search import GhostlineIndex, _default_embed
 
 
 def _make_test_file(frames_data: list[tuple[str, str]]) -> str:
@@ -71,6 +78,256 @@ def test_search_relevance():
         os.unlink(path)
 
 
+def test_index_multiple_files():
+    paths = [
+        _make_test_file([(f"request file{n} frame{i}", "response") for i in range(n)])
+        for n in (3, 1, 7)
+    ]
+    try:
+        idx = GhostlineIndex()
+        for path in paths:
+            idx.add_file(path)
+        assert idx.frame_count == 11
+        results = idx.search("request file7 frame6 response", k=1)
+        assert (results[0]["file"], results[0]["frame_idx"]) == (paths[2], 6)
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+def test_search_normalizes_custom_embeddings():
+    path = _make_test_file([("a", "x"), ("b", "y")])
+    try:
+        idx = GhostlineIndex(embed_fn=lambda text: np.array([len(text), 3.0]))
+        idx.add_file(path)
+        results = idx.search("query")
+        # "a x" -> (3, 3), "query" -> (5, 3): cosine is 24 / sqrt(18 * 34)
+        assert [round(r["score"], 5) for r in results] == [round(24 / np.sqrt(18 * 34), 5)] * 2
+    finally:
+        os.unlink(path)
+
+
+def test_quantized_index_matches_float():
+    path = _make_test_file([(f"request number {i} about topic{i % 5}", "ok") for i in range(40)])
+    try:
+        exact = GhostlineIndex()
+        exact.add_file(path)
+        quantized = GhostlineIndex(quantize=True)
+        quantized.add_file(path)
+        assert quantized._matrix.dtype == np.int8
+        for query in ("request number 3 about topic3 ok", "request number 17 about topic2 ok"):
+            expected = exact.search(query, k=3)
+            actual = quantized.search(query, k=3)
+            assert actual[0]["frame_idx"] == expected[0]["frame_idx"]
+            for a, e in zip(actual, expected):
+                assert abs(a["score"] - e["score"]) < 0.02
+    finally:
+        os.unlink(path)
+
+
+def test_parallel_index_matches_sequential(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    path = _make_test_file([(f"request {i}", f"response {i * i}") for i in range(20)])
+    try:
+        sequential = GhostlineIndex()
+        sequential.add_file(path)
+        parallel = GhostlineIndex(parallel=True)
+        parallel.add_file(path)
+        assert np.array_equal(parallel._vectors(), sequential._vectors())
+        assert parallel._meta == sequential._meta
+    finally:
+        os.unlink(path)
+
+
+def test_embed_cache_reused(tmp_path):
+    embedded = []
+
+    def counting_embed(text):
+        embedded.append(text)
+        return _default_embed(text)
+
+    cache = str(tmp_path / "embeddings.db")
+    first = _make_test_file([("alpha", "one"), ("beta", "two")])
+    second = _make_test_file([("alpha", "one"), ("gamma", "three")])
+    try:
+        idx = GhostlineIndex(
+            embed_fn=counting_embed, embed_cache_path=cache, embed_cache_namespace="counting"
+        )
+        idx.add_file(first)
+        assert len(embedded) == 2
+
+        reopened = GhostlineIndex(
+            embed_fn=counting_embed, embed_cache_path=cache, embed_cache_namespace="counting"
+        )
+        reopened.add_file(first)
+        reopened.add_file(second)
+        # One cached text is embedded again to check the vector dimension
+        assert embedded[2:] == ["alpha one", "gamma three"]
+        assert np.array_equal(reopened._vectors()[:2], idx._vectors())
+        assert reopened.search("gamma three", k=1)[0]["file"] == second
+    finally:
+        os.unlink(first)
+        os.unlink(second)
+
+
+def test_embed_cache_namespace(tmp_path):
+    class Embedder:
+        def embed(self, text):
+            return _default_embed(text)
+
+    def make_embed():
+        def embed(text):
+            return _default_embed(text)
+
+        return embed
+
+    cache = str(tmp_path / "embeddings.db")
+    for embed_fn in (
+        lambda text: _default_embed(text),
+        functools.partial(_default_embed),
+        Embedder().embed,
+        make_embed(),
+    ):
+        with pytest.raises(ValueError, match="embed_cache_namespace"):
+            GhostlineIndex(embed_fn=embed_fn, embed_cache_path=cache)
+
+    path = _make_test_file([("alpha", "one")])
+    try:
+        vectors = []
+        for name, embed_fn in (
+            ("hash", lambda text: _default_embed(text)),
+            ("reversed", lambda text: _default_embed(text[::-1])),
+            ("partial", functools.partial(_default_embed)),
+        ):
+            idx = GhostlineIndex(
+                embed_fn=embed_fn, embed_cache_path=cache, embed_cache_namespace=name
+            )
+            idx.add_file(path)
+            vectors.append(idx._vectors()[0])
+        assert not np.array_equal(vectors[0], vectors[1])
+        assert np.array_equal(vectors[0], vectors[2])
+    finally:
+        os.unlink(path)
+
+
+def test_embed_cache_checks_dimension(tmp_path):
+    cache = str(tmp_path / "embeddings.db")
+    path = _make_test_file([("alpha", "one"), ("beta", "two")])
+    try:
+        for size in (8, 16, 8):
+            idx = GhostlineIndex(
+                embed_fn=lambda text, size=size: _default_embed(text)[:size] + 1,
+                embed_cache_path=cache,
+                embed_cache_namespace="shared",
+            )
+            idx.add_file(path)
+            idx.add_file(path)
+            assert idx._vectors().shape == (4, size)
+    finally:
+        os.unlink(path)
+
+
+def test_default_embed():
+    vec = _default_embed("Alpha beta alpha")
+    assert vec.dtype == np.float32 and vec.shape == (256,)
+    assert np.isclose(np.linalg.norm(vec), 1.0)
+    assert np.array_equal(vec, _default_embed("beta ALPHA alpha"))
+    assert not _default_embed("").any()
+
+
+def test_search_previews_and_full_text():
+    long_response = "detail " * 100
+    path = _make_test_file([("short question", long_response), ("other", "reply")])
+    try:
+        idx = GhostlineIndex()
+        idx.add_file(path)
+        result = idx.search("short question detail", k=1)[0]
+        assert result["frame_idx"] == 0
+        assert result["text_preview"] == ("short question " + long_response)[:200]
+        assert idx.get_full_text(result) == "short question " + long_response
+    finally:
+        os.unlink(path)
+
+
+def test_search_k_bounds():
+    path = _make_test_file([(f"frame {i} text", "reply") for i in range(6)])
+    try:
+        idx = GhostlineIndex()
+        idx.add_file(path)
+        assert idx.search("frame text", k=0) == []
+        results = idx.search("frame 2 text", k=10)
+        assert len(results) == 6
+        scores = [r["score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+    finally:
+        os.unlink(path)
+
+
+class _FakeZvecCollection:
+    def __init__(self, name, dimension, metric):
+        self.ids = []
+
+    def add(self, id, vector, metadata):
+        self.ids.append(id)
+
+
+def test_zvec_collection_built_incrementally(monkeypatch):
+    monkeypatch.setitem(sys.modules, "zvec", types.SimpleNamespace(Collection=_FakeZvecCollection))
+    paths = [_make_test_file([("a", "b")] * n) for n in (2, 3)]
+    try:
+        idx = GhostlineIndex()
+        for path in paths:
+            idx.add_file(path)
+        assert idx.using_zvec
+        assert idx._zvec_collection.ids == [str(i) for i in range(5)]
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+def test_faiss_matches_numpy(monkeypatch):
+    pytest.importorskip("faiss")
+    paths = [_make_test_file([(f"request {n} item{i}", f"answer{i % 4}") for i in range(n)]) for n in (9, 5)]
+    try:
+        with_faiss = GhostlineIndex()
+        for path in paths:
+            with_faiss.add_file(path)
+        monkeypatch.setitem(sys.modules, "faiss", None)
+        with_numpy = GhostlineIndex()
+        for path in paths:
+            with_numpy.add_file(path)
+        assert with_faiss.using_faiss and not with_numpy.using_faiss
+
+        assert with_faiss.search("request 9 item3 answer3", k=1)[0]["frame_idx"] == 3
+        for query in ("request 9 item3 answer3", "answer2"):
+            expected = with_numpy.search(query, k=20)
+            actual = with_faiss.search(query, k=20)
+            assert len(actual) == len(expected) == 14
+            assert np.allclose([r["score"] for r in actual], [r["score"] for r in expected], atol=1e-5)
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
+def test_faiss_switches_to_hnsw(monkeypatch):
+    faiss = pytest.importorskip("faiss")
+    monkeypatch.setattr(search, "_HNSW_MIN_FRAMES", 30)
+    paths = [_make_test_file([(f"request {n} item{i}", "ok") for i in range(n)]) for n in (20, 25)]
+    try:
+        idx = GhostlineIndex()
+        idx.add_file(paths[0])
+        assert isinstance(idx._faiss_index, faiss.IndexFlatIP)
+        idx.add_file(paths[1])
+        assert isinstance(idx._faiss_index, faiss.IndexHNSW)
+        assert idx._faiss_index.ntotal == 45
+        for n, i in ((20, 7), (25, 24)):
+            result = idx.search(f"request {n} item{i} ok", k=3, ef_search=50)[0]
+            assert (result["file"], result["frame_idx"]) == (paths[n == 25], i)
+    finally:
+        for path in paths:
+            os.unlink(path)
+
+
 def test_search_empty_index():
     idx = GhostlineIndex()
     results = idx.search("anything", k=5)
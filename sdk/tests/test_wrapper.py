@@ -0,0 +1,85 @@
+"""Tests for client wrapping."""
+
+import os
+import tempfile
+import types
+
+import pytest
+
+from ghostline.context import record, replay
+from ghostline.format import GhostlineReader
+from ghostline.wrapper import _request_hash, _serialize_request, wrap
+
+
+class _Response:
+    def __init__(self, data: dict):
+        self._data = data
+
+    def model_dump(self):
+        return self._data
+
+
+_RESPONSE = {
+    "id": "resp-1",
+    "choices": [{"message": {"role": "assistant", "content": "héllo"}}],
+    "usage": {"total_tokens": 3},
+}
+
+
+def _fake_litellm(calls: list, response: dict = _RESPONSE):
+    module = types.ModuleType("litellm")
+
+    def completion(**kwargs):
+        calls.append(kwargs)
+        return _Response(response)
+
+    module.completion = completion
+    return wrap(module)
+
+
+def test_serialize_request_is_stable():
+    # These bytes are the replay key; changing them breaks old recordings
+    assert _serialize_request({"b": 1, "a": "é"}) == b'{"a": "\\u00e9", "b": 1}'
+
+
+def test_wrapped_module_records_and_replays():
+    calls = []
+    litellm = _fake_litellm(calls)
+    path = tempfile.mktemp(suffix=".ghostline")
+    request = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+    try:
+        with record(path):
+            litellm.completion(**request)
+        with replay(path):
+            response = litellm.completion(**request)
+            miss_hash = _request_hash(_serialize_request({"model": "other"})).hex()[:16]
+            with pytest.raises(LookupError, match=miss_hash):
+                litellm.completion(model="other")
+        assert len(calls) == 1
+        assert response.choices[0].message.content == "héllo"
+        assert response.usage.total_tokens == 3
+        assert response.model_dump() == _RESPONSE
+    finally:
+        os.unlink(path)
+
+
+def test_wrapped_module_passes_through_without_session():
+    calls = []
+    litellm = _fake_litellm(calls)
+    response = litellm.completion(model="gpt-4o")
+    assert calls == [{"model": "gpt-4o"}]
+    assert response.model_dump() == _RESPONSE
+
+
+def test_recorded_response_scrubs_non_ascii_email():
+    litellm = _fake_litellm([], {"content": "write to Zoë@corp.io"})
+    path = tempfile.mktemp(suffix=".ghostline")
+    try:
+        with record(path):
+            litellm.completion(model="gpt-4o")
+        with open(path, "rb") as f, GhostlineReader(f) as reader:
+            response = reader.get_frame(0).response_bytes
+        assert b"corp.io" not in response
+        assert b"[REDACTED_EMAIL]" in response
+    finally:
+        os.unlink(path)